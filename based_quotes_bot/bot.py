@@ -1,25 +1,73 @@
-from telegram import Bot
-from telegram.ext import Application, MessageHandler
+import time
+
+from telegram import Bot, Update
+from telegram.ext import Application, MessageHandler, filters
+from telegram.request import HTTPXRequest
 
 from settings import CHAT_LINK
 
 
+def _make_request() -> HTTPXRequest:
+    """
+    A single keep-alive connection is enough for one bot and one channel,
+    it is reused between requests instead of a new TLS handshake.
+    """
+    return HTTPXRequest(
+        connection_pool_size=1,
+        pool_timeout=None,
+        http_version="1.1",
+    )
+
+
+# the stub is sent to each chat at most once per interval (in seconds),
+# the rest of the messages are left unanswered; the replies are kept in
+# the order of their time, the ones older than the interval are dropped
+_REPLY_INTERVAL = 60
+_LAST_REPLIES: dict[int, float] = {}
+
+
 async def command_im_silly(update, context):
-    return await update.effective_chat.send_message(
+    chat = update.effective_chat
+    now = time.monotonic()
+    last_reply = _LAST_REPLIES.get(chat.id)
+    if last_reply is not None and now - last_reply < _REPLY_INTERVAL:
+        return None
+
+    # the chat is moved to the end, behind the older replies
+    _LAST_REPLIES.pop(chat.id, None)
+    _LAST_REPLIES[chat.id] = now
+    # the oldest replies are at the beginning, the current one stops it
+    oldest_chat_id = next(iter(_LAST_REPLIES))
+    while now - _LAST_REPLIES[oldest_chat_id] >= _REPLY_INTERVAL:
+        del _LAST_REPLIES[oldest_chat_id]
+        oldest_chat_id = next(iter(_LAST_REPLIES))
+    return await chat.send_message(
         "Sorry, I'm a silly machine and I don't understand anything.",
     )
 
 
 async def app_init(token: str):
     """
-    The bot just displays a stub when any message are received.
+    The bot just displays a stub when a text message is received in a
+    private chat. Other updates (edits, channel posts, service messages)
+    are not even requested from Telegram.
     """
 
-    app = Application.builder().token(token).build()
-    app.add_handler(MessageHandler(None, command_im_silly, False))
+    app = (
+        Application.builder()
+        .token(token)
+        .request(_make_request())
+        .get_updates_request(_make_request())
+        .build()
+    )
+    app.add_handler(MessageHandler(
+        filters.ChatType.PRIVATE & filters.TEXT,
+        command_im_silly,
+        False,
+    ))
 
     await app.initialize()
-    await app.updater.start_polling()
+    await app.updater.start_polling(allowed_updates=[Update.MESSAGE])
     await app.start()
 
 
@@ -31,6 +79,6 @@ async def send_quote(bot: Bot, quote: str):
 
 
 async def bot_init(token: str):
-    bot = Bot(token)
+    bot = Bot(token, request=_make_request())
     await bot.initialize()
     return bot
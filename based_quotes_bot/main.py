@@ -2,22 +2,35 @@ import asyncio
 
 from settings import logger, TOKEN
 from bot import app_init, bot_init, send_quote
-from service import get_quote, calc_waiting_seconds
+from service import (
+    get_quotes,
+    calc_waiting_seconds,
+    schedule_next_sending,
+    calc_missed_sendings,
+    save_sending_time,
+    join_quotes,
+)
 
 
 async def maintain_channel(bot):
     """
     waits until the post is scheduled amd sends the quote.
+    If the bot was not working for some days, the quotes for the missed
+    days are sent together with the current one.
     """
 
     waiting_time = calc_waiting_seconds()
     logger.info(f"Waiting {waiting_time} seconds")
     await asyncio.sleep(waiting_time)
 
-    quote = get_quote()
-    logger.info(f"Sending quote < {quote} >")
-    await send_quote(bot, quote)
-    await asyncio.sleep(1)
+    (count, sending_time) = calc_missed_sendings()
+    quotes = get_quotes(count)
+    for quote in quotes:
+        logger.info(f"Sending quote < {quote} >")
+    for message in join_quotes(quotes):
+        await send_quote(bot, message)
+    save_sending_time(sending_time)
+    schedule_next_sending(sending_time)
 
 
 async def main():
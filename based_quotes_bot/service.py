@@ -1,39 +1,184 @@
 import datetime
 import random
+import time
 from pathlib import Path
 
-from settings import SENDING_TIME, QUOTES_PATH
+from settings import SENDING_TIME, QUOTES_PATH, LAST_SENDING_PATH
 
 
 __all__ = [
-    "get_quote",
+    "get_quotes",
     "calc_waiting_seconds",
+    "schedule_next_sending",
+    "calc_missed_sendings",
+    "save_sending_time",
+    "join_quotes",
 ]
 
 
-def get_quote(path: Path = QUOTES_PATH) -> str:
+_SAMPLE = random.sample
+
+# (modification times of the data files, quotes read from them)
+_QUOTES_CACHE: tuple[tuple[tuple[Path, float], ...], tuple[str, ...]] | None = None
+
+
+def _read_quotes(file_paths: list[Path]) -> tuple[str, ...]:
+    """
+    Reads data files and returns the filtered quotes, already in the form
+    in which they are sent.
+    """
+
+    quotes = []
+    for file_path in file_paths:
+        # blank and commented lines are dropped before they are decoded
+        lines = file_path.read_bytes().splitlines()
+        quotes.extend(
+            line.decode("utf-8").lower()
+            for line in lines
+            if line and line[:1] != b"#"
+        )
+    return tuple(quotes)
+
+
+def get_quotes(count: int = 1, path: Path = QUOTES_PATH) -> list[str]:
     """
-    Reads data files, filters and returns a random quote.
-    The reading is performed each time before a choice to allow updating
-    the data without restarting the project.
+    Returns random quotes from the data files, all different (or all the
+    quotes, if there are fewer of them).
+    The files are checked each time before a choice to allow updating
+    the data without restarting the project, but they are re-read only
+    if any of them has been changed (by modification time).
     """
 
-    data = []
-    for file_path in path.absolute().glob("*.txt"):
-        with open(file_path) as file:
-            data.extend(file.read().splitlines())
+    global _QUOTES_CACHE
+
+    file_paths = sorted(path.glob("*.txt"))
+    mtimes = tuple((file_path, file_path.stat().st_mtime) for file_path in file_paths)
+    if _QUOTES_CACHE is None or _QUOTES_CACHE[0] != mtimes:
+        _QUOTES_CACHE = (mtimes, _read_quotes(file_paths))
 
-    quotes = list(filter(lambda l: l and not l.startswith("#"), data))
-    return random.choice(quotes).lower()
+    quotes = _QUOTES_CACHE[1]
+    return _SAMPLE(quotes, min(count, len(quotes)))
 
 
-def calc_waiting_seconds() -> int:
+# the next sending time as a `time.monotonic()` value, and the same time
+# as a wall-clock timestamp
+_NEXT_DEADLINE: float | None = None
+_NEXT_SENDING: float | None = None
+
+
+def _plan_next_sending(last_sending: float | None = None):
+    """
+    Finds the next sending time by the UTC wall clock and keeps it as a
+    monotonic deadline. The time is always later than the last sending,
+    so the same sending is not repeated.
+    """
+
+    global _NEXT_DEADLINE, _NEXT_SENDING
+
     now = datetime.datetime.now(datetime.UTC)
     today = datetime.datetime.combine(now, datetime.time(), tzinfo=datetime.UTC)
     sending_datetime = today + SENDING_TIME
 
     if now > sending_datetime:
         sending_datetime += datetime.timedelta(days=1)
+    while last_sending is not None and sending_datetime.timestamp() <= last_sending:
+        sending_datetime += datetime.timedelta(days=1)
+
+    _NEXT_SENDING = sending_datetime.timestamp()
+    _NEXT_DEADLINE = time.monotonic() + (sending_datetime - now).total_seconds()
+
 
-    waiting_time = (sending_datetime - now).seconds
+def calc_waiting_seconds() -> float:
+    """
+    Returns the number of seconds until the next sending time.
+    Between the sendings the time is counted by the monotonic clock,
+    which does not jump.
+    """
+
+    if _NEXT_DEADLINE is None:
+        _plan_next_sending()
+
+    waiting_time = max(0.0, _NEXT_DEADLINE - time.monotonic())
     return waiting_time
+
+
+def schedule_next_sending(last_sending: float):
+    """
+    Moves the sending time to the day after the last sending, it is
+    called after sending. The time is found by the wall clock again, so
+    the schedule returns to the sending time after the host was
+    suspended.
+    """
+    _plan_next_sending(last_sending)
+
+
+# no more than a week is caught up after a long downtime
+_MAX_MISSED_SENDINGS = 7
+# the sleep is counted by the monotonic clock, it may wake up a little
+# earlier than the sending time by the wall clock
+_CLOCK_MARGIN = 60
+_DAY = datetime.timedelta(days=1).total_seconds()
+# the maximum length of a Telegram message
+_MESSAGE_LIMIT = 4096
+
+
+def calc_missed_sendings(
+        path: Path = LAST_SENDING_PATH,
+        scheduled: float | None = None,
+        now: float | None = None,
+) -> tuple[int, float]:
+    """
+    Returns how many quotes are due now (one for the current sending and
+    one for each day missed since the last sending) and the time of the
+    current sending, which is saved after sending.
+    The current sending is the scheduled one, or the latest one that has
+    come by the wall clock, if the bot woke up late (for example, the
+    host was suspended).
+    """
+
+    if now is None:
+        now = time.time()
+    if scheduled is None:
+        scheduled = now if _NEXT_SENDING is None else _NEXT_SENDING
+
+    late_days = max(0, int((now - scheduled + _CLOCK_MARGIN) // _DAY))
+    sending_time = scheduled + late_days * _DAY
+
+    try:
+        last_sending = float(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return 1, sending_time
+
+    # the sendings are a whole number of days apart
+    missed = round((sending_time - last_sending) / _DAY)
+    return min(max(missed, 1), _MAX_MISSED_SENDINGS), sending_time
+
+
+def save_sending_time(sending_time: float, path: Path = LAST_SENDING_PATH):
+    """
+    Saves the time of the current sending (see `calc_missed_sendings`),
+    the missed days are counted from it.
+    """
+    path.write_text(str(sending_time))
+
+
+def join_quotes(quotes: list[str], limit: int = _MESSAGE_LIMIT) -> list[str]:
+    """
+    Joins the quotes into as few messages as possible (separated by an
+    empty line), so that each message fits within the limit.
+    """
+
+    messages = []
+    message = ""
+    for quote in quotes:
+        if not message:
+            message = quote
+        elif len(message) + 2 + len(quote) <= limit:
+            message += "\n\n" + quote
+        else:
+            messages.append(message)
+            message = quote
+
+    if message:
+        messages.append(message)
+    return messages
@@ -1,49 +1,76 @@
+import atexit
 import datetime
+import functools
 import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 
 __all__ = [
     "logger",
     "QUOTES_PATH",
+    "LAST_SENDING_PATH",
     "SENDING_TIME",
     "TOKEN",
     "CHAT_LINK",
 ]
 
 
+# the records are only put in the queue by the logger, the writing is
+# done by the listener thread so as not to block the event loop;
+# the handlers are installed once, even if the module is imported again
 logger = logging.getLogger("application")
 logger.setLevel(logging.INFO)
-_formatter = logging.Formatter("{asctime:<23} >>| {msg}", style='{')
-_file_handler = logging.FileHandler("logs.log", mode='a')
-_file_handler.setFormatter(_formatter)
-logger.addHandler(_file_handler)
-_terminal_handler = logging.StreamHandler()
-_terminal_handler.setFormatter(_formatter)
-logger.addHandler(_terminal_handler)
+logger.propagate = False
+if not logger.handlers:
+    _formatter = logging.Formatter("{asctime:<23} >>| {msg}", style='{')
+    _file_handler = logging.FileHandler("logs.log", mode='a')
+    _file_handler.setFormatter(_formatter)
+    _terminal_handler = logging.StreamHandler()
+    _terminal_handler.setFormatter(_formatter)
+    _log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(_log_queue))
+    _log_listener = QueueListener(_log_queue, _file_handler, _terminal_handler)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
 
 
-_ENVS: dict[str, str] | None = None
+_ENV_PATH = Path(__file__).with_name(".env")
 
-def _read_env():
-    env_path = Path(__file__).parent / ".env"
-    with open(env_path.absolute()) as file:
+
+def _load_env():
+    """
+    Reads the `.env` file into the environment variables. The variables
+    that are already set in the environment take precedence over the file.
+    """
+
+    with open(_ENV_PATH) as file:
         data = file.read().splitlines()
 
-    global _ENVS
-    data = list(filter(bool, data))
-    _ENVS = dict(line.split("=") for line in data)
+    for line in data:
+        if not line or line[0] == "#":
+            continue
+        key, sep, value = line.partition("=")
+        if sep:
+            os.environ.setdefault(key.strip(), value.strip())
+
+
+_load_env()
 
 
+@functools.cache
 def _env(arg: str, default=None):
-    if _ENVS is None:
-        _read_env()
-    return _ENVS.get(arg, default)
+    return os.environ.get(arg, default)
 
 
 _LAUNCH_VERSION = _env("LAUNCH_VERSION", "PRODUCTION")
 
-QUOTES_PATH = Path(__file__).parent / "data"
+QUOTES_PATH = Path(__file__).with_name("data")
+# the time of the last sending, to catch up on the days missed while the
+# bot was not working
+LAST_SENDING_PATH = QUOTES_PATH / ".last_sending"
 SENDING_TIME = datetime.timedelta(hours=5, minutes=0, seconds=0)  # UTC
 
 TOKEN = _env("TOKEN" + "_" + _LAUNCH_VERSION)
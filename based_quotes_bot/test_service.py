@@ -0,0 +1,81 @@
+import datetime
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+# the real settings read the `.env` file and the data, only the values
+# used by the service are needed here; the stub replaces them even if they
+# are already imported, and the service is imported again with it
+_settings = types.ModuleType("settings")
+_settings.SENDING_TIME = datetime.timedelta(hours=5)
+_settings.QUOTES_PATH = Path(tempfile.gettempdir())
+_settings.LAST_SENDING_PATH = _settings.QUOTES_PATH / ".last_sending"
+with mock.patch.dict(sys.modules, {"settings": _settings}):
+    sys.modules.pop("service", None)
+    import service
+
+
+DAY = datetime.timedelta(days=1).total_seconds()
+
+
+class QuotesTest(unittest.TestCase):
+    def test_different_quotes(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name)
+        (path / "quotes.txt").write_text("One\n# comment\n\nTwo\nThree\n")
+
+        self.assertEqual(sorted(service.get_quotes(3, path)), ["one", "three", "two"])
+        self.assertEqual(len(service.get_quotes(5, path)), 3)
+
+
+class MissedSendingsTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / ".last_sending"
+
+        self.scheduled = 1_700_000_000.0
+        service.save_sending_time(self.scheduled, self.path)
+
+    def count(self, scheduled: float, now: float) -> tuple[int, float]:
+        return service.calc_missed_sendings(self.path, scheduled, now)
+
+    def test_next_day(self):
+        scheduled = self.scheduled + DAY
+        self.assertEqual(self.count(scheduled, scheduled + 0.001), (1, scheduled))
+
+    def test_one_missed_day(self):
+        scheduled = self.scheduled + 2 * DAY
+        self.assertEqual(self.count(scheduled, scheduled + 0.001), (2, scheduled))
+
+    def test_early_wake(self):
+        # the monotonic sleep ends a little before the wall-clock time
+        scheduled = self.scheduled + 3 * DAY
+        self.assertEqual(self.count(scheduled, scheduled - 0.5), (3, scheduled))
+
+    def test_late_wake(self):
+        # the host is suspended for 3 days while waiting for the next day
+        scheduled = self.scheduled + DAY
+        woken = self.scheduled + 4 * DAY + 3600
+        (count, sending_time) = self.count(scheduled, woken)
+        self.assertEqual(count, 4)
+        self.assertEqual(sending_time, self.scheduled + 4 * DAY)
+
+        # the caught up days are not counted again on the next day
+        service.save_sending_time(sending_time, self.path)
+        scheduled = sending_time + DAY
+        self.assertEqual(self.count(scheduled, scheduled), (1, scheduled))
+
+    def test_no_last_sending(self):
+        self.path.unlink()
+        scheduled = self.scheduled + DAY
+        self.assertEqual(self.count(scheduled, scheduled), (1, scheduled))
+
+
+if __name__ == "__main__":
+    unittest.main()
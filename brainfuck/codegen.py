@@ -0,0 +1,124 @@
+import functools
+from types import CodeType
+from typing import Optional, Sequence
+
+from config import Config
+from opcodes import *
+
+
+__all__ = [
+    "make_source",
+    "compile_source",
+]
+
+
+# the function name in the generated source
+FUNCTION_NAME = "execute"
+
+
+def make_source(codes: Sequence[int], args: Sequence[int], config: Config) -> Optional[str]:
+    """
+    Returns the source of a Python function that executes the lowered
+    program (see `RunTime`): the loops become `while` statements and the
+    main operators become inline statements, the rest of the operators
+    (and the main ones in the rare cases) are executed by the `call`
+    argument, as `Operator.do` in the runtime.
+    The function takes the tape, the pointer and `call`, and returns the
+    pointer.
+    Returns None if the loops of the program are not paired.
+    """
+
+    maximum = config.maximum
+    minimum = config.minimum
+    size = config.TAPE_LEN
+
+    lines = [f"def {FUNCTION_NAME}(tape, pointer, call):"]
+    opened = []
+    for (index, (code, arg)) in enumerate(zip(codes, args)):
+        indent = "    " * (len(opened) + 1)
+
+        if code == OP_ADD:
+            lines += [
+                f"{indent}value = tape[pointer] + {arg}",
+                f"{indent}if {minimum} <= value <= {maximum}:",
+                f"{indent}    tape[pointer] = value",
+                f"{indent}else:",
+            ]
+            if config.HAS_OVERLOAD:
+                # the same as the clampers do (see `build_clampers`)
+                variants = maximum - minimum + 1
+                lines.append(f"{indent}    tape[pointer] = {minimum} + (value - {minimum}) % {variants}")
+            else:
+                lines.append(f"{indent}    pointer = call({index}, pointer)")
+
+        elif code == OP_MOVE:
+            lines += [
+                f"{indent}pointer += {arg}",
+                f"{indent}if not 0 <= pointer < {size}:",
+            ]
+            if config.IS_LOOPED:
+                # the same as `Right`, `Left` and `Move` do
+                lines.append(f"{indent}    pointer %= {size}")
+            else:
+                lines.append(f"{indent}    pointer = call({index}, pointer - {arg})")
+
+        elif code == OP_WHILE:
+            if codes[arg] != OP_WHILE_END or args[arg] != index:
+                return None
+            lines.append(f"{indent}while tape[pointer]:")
+            opened.append(index)
+
+        elif code == OP_WHILE_END:
+            if not opened or opened.pop() != arg:
+                return None
+            # the loop body may be empty
+            lines.append(f"{indent}pass")
+
+        elif code == OP_CLEAR:
+            sign = ">" if arg else "<"
+            lines += [
+                f"{indent}value = tape[pointer]",
+                f"{indent}if value {sign} 0:",
+                f"{indent}    tape[pointer] = 0",
+                f"{indent}elif value:",
+                f"{indent}    pointer = call({index}, pointer)",
+            ]
+
+        elif code == OP_ADD_TO:
+            lines += [
+                f"{indent}value = tape[pointer]",
+                f"{indent}if value:",
+                f"{indent}    target = pointer + {arg}",
+                f"{indent}    if value > 0 and 0 <= target < {size} and tape[target] + value <= {maximum}:",
+                f"{indent}        tape[target] += value",
+                f"{indent}        tape[pointer] = 0",
+                f"{indent}    else:",
+                f"{indent}        pointer = call({index}, pointer)",
+            ]
+
+        elif code == OP_END:
+            lines.append(f"{indent}return pointer")
+
+        else:
+            lines.append(f"{indent}pointer = call({index}, pointer)")
+
+    if opened:
+        return None
+
+    lines.append("    return pointer")
+    return "\n".join(lines) + "\n"
+
+
+@functools.lru_cache(maxsize=32)
+def compile_source(source: str) -> Optional[CodeType]:
+    """
+    Compiles the generated source, the code is cached, so the same
+    program is compiled once.
+    Returns None if Python cannot compile it (for example, the loops are
+    nested too deep for Python blocks).
+    """
+
+    try:
+        return compile(source, "<program>", "exec")
+    except (SyntaxError, RecursionError, MemoryError):
+        return None
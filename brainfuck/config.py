@@ -1,18 +1,22 @@
-from dataclasses import dataclass
-from typing import Final
+from array import array
+from dataclasses import dataclass, field
+from typing import Callable, Final, MutableSequence
 
 from exeptions import ExecutionError
 
 __all__ = [
     "Config",
+    "build_clampers",
 ]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Config:
     """
     A class that contains all the run parameters and some useful
     functions related to the parameters.
+    After initialization, parameters cannot be changed (the class is
+    frozen).
     """
 
     # length of the values tape
@@ -35,19 +39,36 @@ class Config:
 
     # ======
 
-    # After class initialization, parameters cannot be changed
-    __is_init: bool = False
+    # calculated from the parameters above
+    maximum: int = field(init=False)
+    minimum: int = field(init=False)
 
-    def __setattr__(self, key, value):
-        if self.__is_init:
-            raise ValueError("Nothing can be changed after initialization")
-        super().__setattr__(key, value)
+    def __post_init__(self):
+        # the class is frozen, so the setting is done bypassing it
+        object.__setattr__(self, "maximum", self.MAX_NUMBER - 1)
+        object.__setattr__(
+            self,
+            "minimum",
+            -self.MAX_NUMBER if self.HAS_MINUS else 0,
+        )
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.maximum: Final[int] = self.MAX_NUMBER - 1
-        self.minimum: Final[int] = -self.MAX_NUMBER if self.HAS_MINUS else 0
-        self.__is_init = True
+    def make_tape(self) -> MutableSequence[int]:
+        """
+        Returns a new zeroed tape in the most compact storage that fits
+        the cell values: `bytearray` for the classic unsigned byte cells,
+        a typed `array` for other fixed-size cells, and a list for the
+        cells that are too large for the arrays.
+        """
+
+        if self.minimum >= 0 and self.maximum <= 0xff:
+            return bytearray(self.TAPE_LEN)
+
+        for typecode in ("b", "h", "i", "q"):
+            bound = 1 << (array(typecode).itemsize * 8 - 1)
+            if -bound <= self.minimum and self.maximum < bound:
+                return array(typecode, [0]) * self.TAPE_LEN
+
+        return [0] * self.TAPE_LEN
 
     def check_on_max_value(self, number: int) -> int:
         """
@@ -91,3 +112,46 @@ class Config:
         if not self.HAS_MINUS:
             return number % self.MAX_NUMBER
         return self.minimum + (number - self.MAX_NUMBER) % (self.MAX_NUMBER * 2)
+
+
+Clamper = Callable[[int], int]
+
+
+def build_clampers(config: Config) -> tuple[Clamper, Clamper]:
+    """
+    Returns the functions of `config.check_on_max_value` and
+    `config.check_on_min_value`, specialized for the given configuration.
+    The parameters do not change after initialization, so their checks
+    are done once here and not on every call; the errors are still
+    raised by the methods of the config.
+    """
+
+    maximum = config.maximum
+    minimum = config.minimum
+
+    if config.HAS_OVERLOAD and not config.HAS_MINUS:
+        max_number = config.MAX_NUMBER
+
+        def check_on_value(number: int) -> int:
+            return number % max_number
+
+        return check_on_value, check_on_value
+
+    if config.HAS_OVERLOAD:
+        variants = config.MAX_NUMBER * 2
+
+        def check_on_value(number: int) -> int:
+            return minimum + (number - minimum) % variants
+
+        return check_on_value, check_on_value
+
+    check_max = config.check_on_max_value
+    check_min = config.check_on_min_value
+
+    def check_on_max_value(number: int) -> int:
+        return number if number <= maximum else check_max(number)
+
+    def check_on_min_value(number: int) -> int:
+        return number if number >= minimum else check_min(number)
+
+    return check_on_max_value, check_on_min_value
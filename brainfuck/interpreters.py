@@ -1,8 +1,11 @@
+import bisect
+import functools
 import re
 from abc import ABC, abstractmethod
-from typing import Type, Optional
+from typing import Iterable, Iterator, Type, Optional
 
 from operators import *
+from optimizations import optimize as optimize_operators
 from program import Program
 
 
@@ -44,6 +47,84 @@ __all__ = [
 # === bases ============================================================
 
 
+def compile_commands(names: Iterable[str]) -> tuple[re.Pattern, list[str]]:
+    """
+    Compiles the commands into one regex alternation.
+    The alternation tries the commands in the given order and takes the
+    first that matches, and the search skips the other characters, so
+    the single pass over the text gives the same result as checking all
+    the commands at each position.
+    Each command ends with an empty group, so the match tells which
+    command it is by `lastindex`, without comparing the text; the
+    commands are returned in the order of their groups.
+    """
+
+    names = list(names)
+    pattern = "|".join(re.escape(name) + "()" for name in names)
+    return re.compile(pattern), names
+
+
+def compile_trie(names: Iterable[str]) -> tuple[re.Pattern, list[str]]:
+    """
+    Compiles the commands into a regex built as a prefix tree: the
+    commands with a common beginning share one branch, so each character
+    of the text is checked once, and not once for each command.
+    At each branch the longer command is tried first.
+    The groups are the same as in `compile_commands`.
+    """
+
+    trie = {}
+    for name in names:
+        node = trie
+        for char in name:
+            node = node.setdefault(char, {})
+        node[""] = name
+
+    group_names = []
+
+    def to_regex(node: dict) -> str:
+        branches = [
+            re.escape(char) + to_regex(child)
+            for (char, child) in node.items()
+            if char
+        ]
+        if "" in node:
+            branches.append("()")
+            group_names.append(node[""])
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return re.compile(to_regex(trie)), group_names
+
+
+def compile_ascii(pattern: re.Pattern) -> Optional[re.Pattern]:
+    """
+    Returns the bytes version of the commands regex, it scans ASCII texts
+    faster than the string one. Returns None if the commands are not ASCII.
+    """
+
+    if not pattern.pattern.isascii():
+        return None
+    return re.compile(pattern.pattern.encode("ascii"))
+
+
+def find_commands(
+        pattern: re.Pattern,
+        ascii_pattern: Optional[re.Pattern],
+        text: str,
+        pos: int = 0,
+) -> Iterator[re.Match]:
+    """
+    Finds the commands in the text. ASCII texts are scanned as bytes, the
+    positions of the matches are the same.
+    """
+
+    if ascii_pattern is not None and text.isascii():
+        return ascii_pattern.finditer(text.encode("ascii"), pos)
+    return pattern.finditer(text, pos)
+
+
 class Interpreter(ABC):
     """
     Interpreter base class.
@@ -63,19 +144,52 @@ class Interpreter(ABC):
     def parse_text(self, text: str) -> list[Operator]:
         pass
 
-    def translate(self) -> Program:
+    def translate(self, optimize: bool = True) -> Program:
+        """
+        Returns the program ready for execution.
+        If `optimize` is set, the typical sets of operators are replaced
+        with the faster ones (see `optimizations`); it can be turned off
+        to debug the program operator by operator.
+        The operators are cached by the text (see `translate_operators`),
+        so the same program is parsed once.
+        """
+
+        operators = translate_operators(type(self), self.text, optimize)
+        return Program(self.text, list(operators))
+
+    def make_operators(self, optimize: bool) -> list[Operator]:
         """
         Parses the program text and does the system actions that parsing
         requires.
-        Returns the program ready for execution.
         """
 
+        parsed_operators = self.parse_text(self.text)
+        if optimize:
+            parsed_operators = optimize_operators(parsed_operators)
+
         operators = [
             Start("~start~", (0, 0)),
-            *self.parse_text(self.text),
+            *parsed_operators,
             End("~end~", (0, 0))
         ]
-        return Program(self.text, operators)
+        link_loops(operators)
+        link_repeats(operators)
+        return operators
+
+
+@functools.lru_cache(maxsize=128)
+def translate_operators(
+        interpreter: Type[Interpreter],
+        text: str,
+        optimize: bool,
+) -> tuple[Operator, ...]:
+    """
+    Returns the operators of the program text in the language.
+    The operators keep no execution state (it is all in the runtime), so
+    they are cached and shared by the programs of the same text.
+    """
+
+    return tuple(interpreter(text).make_operators(optimize))
 
 
 class Trivial(Interpreter, ABC):
@@ -113,27 +227,65 @@ class WithUniqueCommand(Interpreter, ABC):
     """
 
     operators: dict[str, Type[Operator]]
+    _pattern: re.Pattern
+    _ascii_pattern: Optional[re.Pattern]
+    # the command and its operator by the regex group number
+    _commands: list[Optional[tuple[str, Type[Operator]]]]
+
+    def __init_subclass__(cls, **kwargs):
+        # the regex is compiled once, when the language class is created,
+        # and is shared by all its interpreters
+        super().__init_subclass__(**kwargs)
+        if "operators" in cls.__dict__:
+            cls._pattern, names = compile_trie(cls.operators.keys())
+            cls._ascii_pattern = compile_ascii(cls._pattern)
+            cls._commands = [None] + [(name, cls.operators[name]) for name in names]
 
     def parse_text(self, text) -> list[Operator]:
-        operator_names = self.operators.keys()
+        commands = self._commands
+        return [
+            operator_class(name, mat.span())
+            for mat in find_commands(self._pattern, self._ascii_pattern, text)
+            for (name, operator_class) in [commands[mat.lastindex]]
+        ]
 
-        cursor = 0
-        operators = []
-        while cursor <= len(text):
-            for name in operator_names:
-                if not text[cursor:].startswith(name):
-                    continue
 
-                operator_class = self.operators[name]
-                operator = operator_class(name, (cursor, cursor+len(name)))
+class WithFixedWidthCommand(WithUniqueCommand, ABC):
+    """
+    A subclass of `WithUniqueCommand` where all the commands have the same
+    width. A text of only the commands is cut into pieces of that width,
+    any other text is parsed with the regex.
+    Examples: Ternary, Triplet, BinaryFuck.
+    """
 
-                operators.append(operator)
-                cursor += len(name)
-                break
-            else:
-                cursor += 1
+    # the position of the first command in the text
+    commands_start: int = 0
+    _width: int
 
-        return operators
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "operators" in cls.__dict__:
+            cls._width = len(next(iter(cls.operators)))
+
+    def parse_text(self, text) -> list[Operator]:
+        operators = self.operators
+        width = self._width
+        try:
+            return [
+                operators[command](command, (start, start + width))
+                for start in range(self.commands_start, len(text) - width + 1, width)
+                for command in [text[start:start+width]]
+            ]
+        except KeyError:
+            # there are other symbols between the commands
+            commands = self._commands
+            return [
+                operator_class(name, mat.span())
+                for mat in find_commands(
+                    self._pattern, self._ascii_pattern, text, self.commands_start
+                )
+                for (name, operator_class) in [commands[mat.lastindex]]
+            ]
 
 
 class WithOrderedCommand(Interpreter, ABC):
@@ -147,28 +299,27 @@ class WithOrderedCommand(Interpreter, ABC):
     """
 
     operators: dict[str, tuple[int, Type[Operator]]]
+    _pattern: re.Pattern
+    _ascii_pattern: Optional[re.Pattern]
+    _commands: list[Optional[tuple[str, Type[Operator]]]]
+
+    def __init_subclass__(cls, **kwargs):
+        # the same as for `WithUniqueCommand`, but the commands are put in
+        # the regex in the order of their priority
+        super().__init_subclass__(**kwargs)
+        if "operators" in cls.__dict__:
+            sorted_operators = sorted(cls.operators.items(), key=lambda item: item[1][0])
+            cls._pattern, names = compile_commands(item[0] for item in sorted_operators)
+            cls._ascii_pattern = compile_ascii(cls._pattern)
+            cls._commands = [None] + [(name, cls.operators[name][1]) for name in names]
 
     def parse_text(self, text) -> list[Operator]:
-        sorted_operators = sorted(self.operators.items(), key=lambda item: item[1][0])
-        operator_names = [item[0] for item in sorted_operators]
-
-        cursor = 0
-        operators = []
-        while cursor <= len(self.text):
-            for name in operator_names:
-                if not self.text[cursor:].startswith(name):
-                    continue
-
-                operator_class = self.operators[name][1]
-                operator = operator_class(name, (cursor, cursor+len(name)))
-
-                operators.append(operator)
-                cursor += len(name)
-                break
-            else:
-                cursor += 1
-
-        return operators
+        commands = self._commands
+        return [
+            operator_class(name, mat.span())
+            for mat in find_commands(self._pattern, self._ascii_pattern, text)
+            for (name, operator_class) in [commands[mat.lastindex]]
+        ]
 
 
 class CustomCommand(Interpreter, ABC):
@@ -260,6 +411,7 @@ class AAA(Trivial, WithUniqueCommand):
     }
 
     RANGE = tuple[int, int]
+    BRACKETS = re.compile(r"[()]")
 
     def get_comment_ranges(self, text: str) -> list[RANGE]:
         """
@@ -276,7 +428,9 @@ class AAA(Trivial, WithUniqueCommand):
         nesting = 0
         start = -1
         ranges = []
-        for (num, char) in enumerate(text):
+        # only the brackets are looked at, the rest of the text is skipped
+        for mat in self.BRACKETS.finditer(text):
+            num, char = mat.start(), mat.group()
             if char == "(":
                 nesting += 1
                 if nesting == 1:
@@ -300,33 +454,30 @@ class AAA(Trivial, WithUniqueCommand):
 
         return ranges
 
-    def is_not_comment(self, operator: Operator, ranges: list[RANGE]) -> bool:
+    def is_not_comment(self, operator: Operator, ranges: list[RANGE], starts: list[int]) -> bool:
         """
         Checks whether the operator is written inside or outside the
         comments. Ranges are expected to be non-overlapping and sorted
-        in ascending order.
+        in ascending order, `starts` are the starts of the ranges.
         """
 
-        # it can be modified into a binary search
-        for range_ in ranges:
-            if range_[1] < operator.position[0]:
-                continue
-            if range_[0] > operator.position[1]:
-                break
-            return False
-
-        return True
+        # the last comment that starts before the operator ends is the
+        # only one that can contain it
+        index = bisect.bisect_right(starts, operator.position[1]) - 1
+        return index < 0 or ranges[index][1] < operator.position[0]
 
     def parse_text(self, text):
         all_operators = super().parse_text(text)
         comment_ranges = self.get_comment_ranges(text)
-
-        operators = []
-        for operator in all_operators:
-            if self.is_not_comment(operator, comment_ranges):
-                operators.append(operator)
-
-        return operators
+        if not comment_ranges:
+            return all_operators
+
+        starts = [range_[0] for range_ in comment_ranges]
+        return [
+            operator
+            for operator in all_operators
+            if self.is_not_comment(operator, comment_ranges, starts)
+        ]
 
 
 class Alphuck(Trivial, WithUniqueCommand):
@@ -356,7 +507,7 @@ class Alphuck(Trivial, WithUniqueCommand):
     }
 
 
-class BinaryFuck(Trivial, WithUniqueCommand):
+class BinaryFuck(Trivial, WithFixedWidthCommand):
     """
     This language is a trivial translation of BrainFuck, but with the `1`
     symbol at the beginning of the text.
@@ -384,13 +535,7 @@ class BinaryFuck(Trivial, WithUniqueCommand):
         "111": WhileEnd,
     }
 
-    def parse_text(self, text) -> list[Operator]:
-        text = text[1:]  # remove the first `1`
-        operators = super().parse_text(text)
-        for operator in operators:
-            # consider the first `1`
-            operator.position = (operator.position[0] + 1, operator.position[1] + 1)
-        return operators
+    commands_start = 1  # skip the first `1`
 
 
 class BrainSymbol(Trivial, WithUniqueCommand):
@@ -504,15 +649,15 @@ class Headsecks(Trivial, CustomCommand):
         6: While,
         7: WhileEnd,
     }
+    # the same by the remainder as an index, it is taken as `code & 7`
+    operator_by_remainder = tuple(map(operator_remainder.get, range(8)))
 
     def parse_text(self, text):
-        operators = []
-        for cursor in range(len(text)):
-            char = text[cursor]
-            operator_class = self.operator_remainder[ord(char) % 8]
-            operator = operator_class(char, (cursor, cursor+1))
-            operators.append(operator)
-        return operators
+        operator_by_remainder = self.operator_by_remainder
+        return [
+            operator_by_remainder[ord(char) & 7](char, (cursor, cursor+1))
+            for (cursor, char) in enumerate(text)
+        ]
 
 
 class MessyScript(Trivial, WithUniqueCommand):
@@ -602,20 +747,22 @@ class Oof(Trivial, CustomCommand):
         8: (WhileEnd, "ooooooof"),
     }
 
+    pattern = re.compile(r"o+f")
+
     def parse_text(self, text):
-        pattern = r"[o]{1,}f"
+        operator_remainder = self.operator_remainder
 
         operators = []
-        for mat in re.finditer(pattern, text):
-            operator_group = mat.group()
-            operator_kind = (len(operator_group) - 1) % 8 + 1
-            operator_type, name = self.operator_remainder[operator_kind]
-            count = (len(operator_group) - 1) // 8
+        add_operator = operators.append
+        for mat in self.pattern.finditer(text):
+            (start, end) = mat.span()
+            o_count = end - start - 1
+            operator_type, name = operator_remainder[o_count % 8 + 1]
 
-            for operator_num in range(count):
-                start = mat.start() + operator_num * 8
-                operator = operator_type(name, (start, start+8))
-                operators.append(operator)
+            # the repeats go one after another for 8 characters each
+            repeats_end = start + o_count // 8 * 8
+            for operator_start in range(start, repeats_end, 8):
+                add_operator(operator_type(name, (operator_start, operator_start+8)))
 
         return operators
 
@@ -663,10 +810,10 @@ class ReverseFuck(Trivial, WithUniqueCommand):
     """
 
     operators = {
-        "-": Right,
-        "+": Left,
-        ">": Increment,
-        "<": Decrement,
+        "<": Right,
+        ">": Left,
+        "-": Increment,
+        "+": Decrement,
         ",": Output,
         ".": Input,
         "]": While,
@@ -701,7 +848,7 @@ class Roadrunner(Trivial, WithUniqueCommand):
     }
 
 
-class Ternary(Trivial, WithUniqueCommand):
+class Ternary(Trivial, WithFixedWidthCommand):
     """
     A simple translation of BrainFuck, a matching:
     +---+----+
@@ -728,7 +875,7 @@ class Ternary(Trivial, WithUniqueCommand):
     }
 
 
-class Triplet(Trivial, WithUniqueCommand):
+class Triplet(Trivial, WithFixedWidthCommand):
     """
     A simple translation of BrainFuck, a matching:
     +---+-----+
@@ -788,37 +935,37 @@ class Unibrain(Trivial, CustomCommand):
         8: WhileEnd,
     }
 
-    def get_portion(self, word: str, portion: int) -> str:
-        return word[:len(word) // portion]
-
     def find_repetitions_count(self, word: str) -> int:
+        if not word:
+            return 8
+
+        # the first occurrence of the word in the doubled word is its
+        # smallest repeating part, so it is the word of `part_count` parts;
+        # the word can be divided by any divisor of this count
+        part_count = len(word) // (word + word).find(word, 1)
         for portion in range(8, 0, -1):
-            if (
-                    len(word) % portion == 0
-                    and self.get_portion(word, portion) * portion == word
-            ):
+            if part_count % portion == 0:
                 return portion
 
     def parse_text(self, text):
-        # very similar to `Wordfuck`
+        # very similar to `Wordfuck`, but every word between the separators
+        # is an operator, even an empty one
 
-        text = text.replace("\n", " ")
+        operator_remainder = self.operator_remainder
+        find_repetitions_count = self.find_repetitions_count
+        text_len = len(text)
 
         operators = []
+        add_operator = operators.append
         cursor = 0
-        while cursor < len(text):
-            next_space = text.find(" ", cursor)
-            if next_space == -1:
-                next_space = len(text)
-
-            word = text[cursor:next_space]
-            repetitions_count = self.find_repetitions_count(word)
-
-            operator_class = self.operator_remainder[repetitions_count]
-            operator = operator_class(word, (cursor, next_space))
-            operators.append(operator)
+        for word in text.replace("\n", " ").split(" "):
+            if cursor >= text_len:
+                # the text ends with a separator
+                break
 
-            cursor += (next_space - cursor) + 1
+            operator_class = operator_remainder[find_repetitions_count(word)]
+            add_operator(operator_class(word, (cursor, cursor + len(word))))
+            cursor += len(word) + 1
 
         return operators
 
@@ -909,25 +1056,16 @@ class Wordfuck(Trivial, CustomCommand):
         9: WhileEnd,
     }
 
-    def parse_text(self, text):
-        text = text.replace("\n", " ")
-
-        operators = []
-        cursor = 0
-        while cursor < len(text):
-            next_space = text.find(" ", cursor)
-            if next_space == -1:
-                next_space = len(text)
-
-            word_len = next_space - cursor
-            if 1 < word_len <= 9:
-                word = text[cursor:next_space]
-                operator_class = self.operator_remainder[word_len]
-                operator = operator_class(word, (cursor, next_space))
-                operators.append(operator)
-            cursor += word_len + 1
+    words = re.compile(r"[^ \n]+")
 
-        return operators
+    def parse_text(self, text):
+        operator_remainder = self.operator_remainder
+        return [
+            operator_remainder[end - start](mat.group(), (start, end))
+            for mat in self.words.finditer(text)
+            for (start, end) in [mat.span()]
+            if 1 < end - start <= 9
+        ]
 
 
 class ZZZ(Trivial, WithOrderedCommand):
@@ -1029,24 +1167,20 @@ class Fuckfuck(Extended, CustomCommand):
         "bt": WhileEnd,
     }
 
-    def parse_text(self, text):
-        pattern = "(!)|" + "|".join(
-            fr"({f}\w\w{s})"
-            for (f, s) in self.operator_symbs.keys()
-        )
+    # the first group is the repeat, the others are the operators in the
+    # order of `operator_symbs`
+    pattern = re.compile("(!)|" + "|".join(
+        fr"({f}\w\w{s})"
+        for (f, s) in operator_symbs.keys()
+    ))
+    operator_by_group = (None, Repeat, *operator_symbs.values())
 
-        operators = []
-        for res in re.finditer(pattern, self.text):
-            name = res.group()
-            operator_class = (
-                self.operator_symbs[name[0] + name[-1]]
-                if name != "!" else
-                Repeat
-            )
-
-            operators.append(operator_class(name, res.span()))
-
-        return operators
+    def parse_text(self, text):
+        operator_by_group = self.operator_by_group
+        return [
+            operator_by_group[res.lastindex](res.group(), res.span())
+            for res in self.pattern.finditer(text)
+        ]
 
 
 class Ook(Extended, WithUniqueCommand):
@@ -1151,15 +1285,17 @@ class Braincrash(Revision, CustomCommand):
     ]
 
     def parse_text(self, text):
+        commands_order = self.commands_order
         operators = []
+        add_operator = operators.append
 
         c_pointer = 0
         for (num, char) in enumerate(text):
             if char == " ":
                 c_pointer = (c_pointer + 1) % 8
             elif char == "!":
-                operator_type = self.commands_order[c_pointer]
-                operators.append(operator_type("!", (num, num+1)))
+                operator_type = commands_order[c_pointer]
+                add_operator(operator_type("!", (num, num+1)))
                 c_pointer = (c_pointer + 1) % 8
 
         return operators
@@ -1188,15 +1324,17 @@ class PocketBF(Revision, CustomCommand):
     }
 
     def parse_text(self, text):
+        commands = self.commands
         operators = []
+        add_operator = operators.append
 
         direction = 1
         for (num, char) in enumerate(text):
             if char == "=":
                 direction *= -1
-            elif char in self.commands:
-                operator_type = self.commands[char][direction]
-                operators.append(operator_type(char, (num, num+1)))
+            elif char in commands:
+                operator_type = commands[char][direction]
+                add_operator(operator_type(char, (num, num+1)))
 
         return operators
 
@@ -1222,7 +1360,10 @@ class InstructionPointerBF(Revision, CustomCommand):
     }
 
     def parse_text(self, text):
+        commands_order = self.commands_order
+        commands = self.commands
         operators = []
+        add_operator = operators.append
 
         c_pointer = 0
         direction = 1
@@ -1230,12 +1371,12 @@ class InstructionPointerBF(Revision, CustomCommand):
             if char == "0":
                 c_pointer = (c_pointer + 1) % 5
             elif char == "1":
-                char_com = self.commands_order[c_pointer]
+                char_com = commands_order[c_pointer]
                 if char_com == "=":
                     direction *= -1
                 else:
-                    operator_type = self.commands[char_com][direction]
-                    operators.append(operator_type(char, (num, num + 1)))
+                    operator_type = commands[char_com][direction]
+                    add_operator(operator_type(char, (num, num + 1)))
                 c_pointer = (c_pointer + 1) % 5
 
         return operators
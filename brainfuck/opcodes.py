@@ -0,0 +1,35 @@
+__all__ = [
+    "OP_CALL",
+    "OP_END",
+    "OP_ADD",
+    "OP_MOVE",
+    "OP_OUTPUT",
+    "OP_WHILE",
+    "OP_WHILE_END",
+    "OP_CLEAR",
+    "OP_ADD_TO",
+]
+
+
+# Codes of the operators that the runtime executes itself, without
+# calling `Operator.do`. Each operator is lowered into a pair of the code
+# and an integer argument (see `Operator.lower`).
+
+# calls the `do` method of the operator, the argument is not used
+OP_CALL = 0
+# stops the program
+OP_END = 1
+# adds the argument to the current cell
+OP_ADD = 2
+# moves the tape pointer by the argument
+OP_MOVE = 3
+# outputs the current cell
+OP_OUTPUT = 4
+# jumps to the argument if the current cell is zero
+OP_WHILE = 5
+# jumps to the argument if the current cell is not zero
+OP_WHILE_END = 6
+# zeroes the current cell, the argument is 1 if the cell is decremented
+OP_CLEAR = 7
+# adds the current cell to the cell at the argument offset and zeroes it
+OP_ADD_TO = 8
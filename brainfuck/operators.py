@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
+from typing import Optional
 
 from exeptions import ExecutionError
-from program import Program
+from opcodes import *
+from program import Program, STOP
 
 
 __all__ = [
@@ -18,10 +20,20 @@ __all__ = [
     "While",
     "WhileEnd",
 
+    "link_loops",
+    "link_repeats",
+
     "GiveSomeFishfood",
     "Repeat",
     "GiveBanana",
     "InputOutput",
+
+    "Add",
+    "Move",
+    "Clear",
+    "AddToAndZero",
+    "MultiplyAdd",
+    "MoveToZero",
 ]
 
 
@@ -36,8 +48,13 @@ class Operator(ABC):
     Contains name and position to output program errors.
     """
 
+    __slots__ = ("name", "position")
+
     name: str
     position: tuple[int, int]
+    # whether the operator can move the program cursor by itself, such
+    # programs are not compiled (see `RunTime.compile`)
+    is_jumping: bool = False
 
     def __init__(self, name: str, position: tuple[int, int]):
         self.name = name
@@ -47,6 +64,13 @@ class Operator(ABC):
     def do(self, program: Program):
         pass
 
+    def lower(self) -> tuple[int, int]:
+        """
+        Returns the code of the operator for the runtime and its argument
+        (see `opcodes`). By default, the runtime calls the `do` method.
+        """
+        return OP_CALL, 0
+
 
 class Start(Operator):
     """
@@ -54,6 +78,8 @@ class Start(Operator):
     program.
     """
 
+    __slots__ = ()
+
     def do(self, program):
         pass
 
@@ -65,8 +91,13 @@ class End(Operator):
     operator - added to the end of the program to finish it.
     """
 
+    __slots__ = ()
+
     def do(self, program):
-        program.runtime.is_running = False
+        return STOP
+
+    def lower(self):
+        return OP_END, 0
 
 
 # === original operators ===============================================
@@ -79,21 +110,29 @@ class Right(Operator):
     is looped, else it triggers an error.
     """
 
+    __slots__ = ()
+
     def do(self, program):
-        program.runtime.pointer += 1
-        if program.runtime.pointer < program.config.TAPE_LEN:
+        runtime = program.runtime
+        config = program.config
+        pointer = runtime.pointer + 1
+        runtime.pointer = pointer
+        if pointer < config.TAPE_LEN:
             return
 
-        if program.config.IS_LOOPED:
-            program.runtime.pointer = 0
+        if config.IS_LOOPED:
+            runtime.pointer = 0
             return
 
         msg = "tape pointer out of range ({pointer} > {size})".format(
-            pointer=program.runtime.pointer,
-            size=program.config.TAPE_LEN - 1
+            pointer=pointer,
+            size=config.TAPE_LEN - 1
         )
         raise ExecutionError(msg)
 
+    def lower(self):
+        return OP_MOVE, 1
+
 
 class Left(Operator):
     """
@@ -102,18 +141,25 @@ class Left(Operator):
     element if the tape is looped, else it generates an error.
     """
 
+    __slots__ = ()
+
     def do(self, program):
-        program.runtime.pointer -= 1
-        if program.runtime.pointer >= 0:
+        runtime = program.runtime
+        pointer = runtime.pointer - 1
+        runtime.pointer = pointer
+        if pointer >= 0:
             return
 
         if program.config.IS_LOOPED:
-            program.runtime.pointer = program.config.TAPE_LEN - 1
+            runtime.pointer = program.config.TAPE_LEN - 1
             return
 
-        msg = f"tape pointer out of range ({program.runtime.pointer} < 0)"
+        msg = f"tape pointer out of range ({pointer} < 0)"
         raise ExecutionError(msg)
 
+    def lower(self):
+        return OP_MOVE, -1
+
 
 class Increment(Operator):
     """
@@ -122,10 +168,15 @@ class Increment(Operator):
     overflow, it either executes it (if necessary) or generates an error.
     """
 
+    __slots__ = ()
+
     def do(self, program):
-        new_val = program.runtime.current_val + 1
-        overflowed_val = program.config.check_on_max_value(new_val)
-        program.runtime.current_val = overflowed_val
+        runtime = program.runtime
+        new_val = runtime.tape[runtime.pointer] + 1
+        runtime.tape[runtime.pointer] = program.check_on_max_value(new_val)
+
+    def lower(self):
+        return OP_ADD, 1
 
 
 class Decrement(Operator):
@@ -135,10 +186,15 @@ class Decrement(Operator):
     overflow, it either executes it (if necessary) or generates an error.
     """
 
+    __slots__ = ()
+
     def do(self, program):
-        new_val = program.runtime.current_val - 1
-        overflowed_val = program.config.check_on_min_value(new_val)
-        program.runtime.current_val = overflowed_val
+        runtime = program.runtime
+        new_val = runtime.tape[runtime.pointer] - 1
+        runtime.tape[runtime.pointer] = program.check_on_min_value(new_val)
+
+    def lower(self):
+        return OP_ADD, -1
 
 
 class Output(Operator):
@@ -147,6 +203,8 @@ class Output(Operator):
     If the cell value is out of Unicode, it generates an error.
     """
 
+    __slots__ = ()
+
     UNICODE_MAX = 0x10ffff
 
     @classmethod
@@ -154,15 +212,19 @@ class Output(Operator):
         return 0 <= char_code < cls.UNICODE_MAX
 
     def do(self, program):
-        char_code = program.runtime.current_val
+        runtime = program.runtime
+        char_code = runtime.tape[runtime.pointer]
         if not self.is_unicode(char_code):
             msg = "value is out of range of unicode ({value} <> [0:{max}])".format(
                 value=char_code,
                 max=self.UNICODE_MAX
             )
             raise ExecutionError(msg)
-        print(chr(char_code), end="")
-        program.runtime._linebreak_required = char_code != 10  # not "\n"
+        runtime.write(chr(char_code))
+        runtime._linebreak_required = char_code != 10  # not "\n"
+
+    def lower(self):
+        return OP_OUTPUT, 0
 
 
 class Input(Operator):
@@ -172,76 +234,105 @@ class Input(Operator):
     used.
     """
 
+    __slots__ = ()
+
     def do(self, program):
+        runtime = program.runtime
+        runtime.flush()
         char = input("> ")  # TODO: ctrl-c
         char = char.lstrip(" ")[:1]
         char_code = ord(char or "\n")
-        code = program.config.check_on_max_value(char_code)
-        program.runtime.current_val = code
+        runtime.tape[runtime.pointer] = program.check_on_max_value(char_code)
 
 
 class While(Operator):
     """
     The beginning of the loop.
     If the value in the current cell is NOT zero, nothing happens.
-    If the value is zero, it searches for the relevant close loop
-    statement and moves the cursor to it. Nesting is taken into account;
-    if the end of the program is found during the search, it is stopped.
+    If the value is zero, it moves the cursor to the relevant close loop
+    statement. The statement is found when the program is translated
+    (see `link_loops`); if there is none, the cursor is moved to the end
+    of the program and it is stopped.
     """
 
-    def do(self, program):
-        if program.runtime.current_val:
-            return
+    __slots__ = ("jump",)
 
-        cursor = program.runtime.cursor
-        nesting = 0
-        while True:
-            operator = program.runtime.operator
-            if isinstance(operator, While):
-                nesting += 1
-            elif isinstance(operator, WhileEnd):
-                nesting -= 1
+    jump: int
 
-            if nesting == 0:
-                break
-            elif isinstance(operator, End):
-                program.runtime.cursor -= 1
-                break
-            cursor += 1
+    def do(self, program):
+        runtime = program.runtime
+        if not runtime.tape[runtime.pointer]:
+            runtime.cursor = self.jump
 
-        program.runtime.cursor = cursor
+    def lower(self):
+        return OP_WHILE, self.jump
 
 
 class WhileEnd(Operator):
     """
     End of cycle.
     If the value in the current cell is null, nothing happens.
-    If the value is not zero, the relevant loop opening statement (at
-    the back) is searched for and the cursor is moved to it. Nesting is
-    taken into account; if the beginning of the program is found during
-    the search, an error is called.
+    If the value is not zero, the cursor is moved to the relevant loop
+    opening statement (at the back), found when the program is
+    translated (see `link_loops`); if there is none, an error is called.
     """
 
+    __slots__ = ("jump",)
+
+    jump: Optional[int]
+
     def do(self, program):
-        if not program.runtime.current_val:
+        runtime = program.runtime
+        if not runtime.tape[runtime.pointer]:
             return
 
-        cursor = program.runtime.cursor
-        nesting = 0
-        while True:
-            operator = program.operators[cursor]
-            if isinstance(operator, WhileEnd):
-                nesting += 1
-            elif isinstance(operator, While):
-                nesting -= 1
+        if self.jump is None:
+            raise ExecutionError("unexpected end of loop")
+        runtime.cursor = self.jump
+
+    def lower(self):
+        if self.jump is None:
+            return OP_CALL, 0
+        return OP_WHILE_END, self.jump
+
+
+def link_loops(operators: list[Operator]):
+    """
+    Finds the relevant statement for each loop statement, nesting is
+    taken into account. The `While` without a pair jumps to the operator
+    before the last one (which is expected to be `End`), the `WhileEnd`
+    without a pair gets no jump.
+    """
+
+    opened = []
+    for (index, operator) in enumerate(operators):
+        operator_class = type(operator)
+        if operator_class is While:
+            opened.append(index)
+        elif operator_class is WhileEnd:
+            if opened:
+                start = opened.pop()
+                operators[start].jump = index
+                operator.jump = start
+            else:
+                operator.jump = None
 
-            if nesting == 0:
-                break
-            elif isinstance(operator, Start):
-                raise ExecutionError("unexpected end of loop")
-            cursor -= 1
+    for start in opened:
+        operators[start].jump = len(operators) - 2
 
-        program.runtime.cursor = cursor
+
+def link_repeats(operators: list[Operator]):
+    """
+    Finds the repeated operator for each `Repeat`: the nearest previous
+    operator that is not `Repeat` itself.
+    """
+
+    target = 0
+    for (index, operator) in enumerate(operators):
+        if type(operator) is Repeat:
+            operator.target = target
+        else:
+            target = index
 
 
 # === extended operators ===============================================
@@ -252,6 +343,8 @@ class GiveSomeFishfood(Operator):
     The joking operator from the Blub language.
     """
 
+    __slots__ = ()
+
     def do(self, program):
         program._break_line()
         print("*Fishfood transfer takes place* - \"Blub!\"")
@@ -264,15 +357,20 @@ class Repeat(Operator):
     May not work correctly with the `While` and `WhileEnd` operators.
     """
 
-    def do(self, program):
-        cursor = program.runtime.cursor - 1
-        while cursor >= 0 and isinstance(program.operators[cursor], Repeat):
-            cursor -= 1
+    __slots__ = ("target",)
 
-        if isinstance(program.operators[cursor], Start):
+    # the index of the repeated operator, found when the program is
+    # translated (see `link_repeats`)
+    target: int
+    # the previous operator can be a loop statement
+    is_jumping = True
+
+    def do(self, program):
+        operator = program.operators[self.target]
+        if type(operator) is Start:
             raise ExecutionError("no previous operator found")
 
-        program.operators[cursor].do(program)
+        return operator.do(program)
 
 
 class GiveBanana(Operator):
@@ -280,6 +378,8 @@ class GiveBanana(Operator):
     The joking operator from the Ook language.
     """
 
+    __slots__ = ()
+
     def do(self, program):
         program._break_line()
         print("*Banana transfer takes place* - \"Ook!\"")
@@ -293,11 +393,266 @@ class InputOutput(Operator):
     output.
     """
 
+    __slots__ = ()
+
     _input = Input("-", (0, 0))
     _output = Output("-", (0, 0))
 
     def do(self, program):
-        if program.runtime.current_val:
+        runtime = program.runtime
+        if runtime.tape[runtime.pointer]:
             self._output.do(program)
         else:
             self._input.do(program)
+
+
+# === optimized operators ==============================================
+# not included in languages, they replace the sets of the original
+# operators when the program is optimized
+
+
+class Add(Operator):
+    """
+    A row of `Increment` (or `Decrement`) operators, changes the value
+    of the current cell by `value` at once.
+    The value is checked in the same way as by the single operators.
+    """
+
+    __slots__ = ("value",)
+
+    value: int
+
+    def __init__(self, name: str, position: tuple[int, int], value: int):
+        super().__init__(name, position)
+        self.value = value
+
+    def do(self, program):
+        runtime = program.runtime
+        new_val = runtime.tape[runtime.pointer] + self.value
+        if self.value > 0:
+            overflowed_val = program.check_on_max_value(new_val)
+        else:
+            overflowed_val = program.check_on_min_value(new_val)
+        runtime.tape[runtime.pointer] = overflowed_val
+
+    def lower(self):
+        return OP_ADD, self.value
+
+
+class Move(Operator):
+    """
+    A row of `Right` (or `Left`) operators, moves the tape pointer by
+    `value` cells at once.
+    The tape bounds are checked in the same way as by the single
+    operators.
+    """
+
+    __slots__ = ("value",)
+
+    value: int
+
+    def __init__(self, name: str, position: tuple[int, int], value: int):
+        super().__init__(name, position)
+        self.value = value
+
+    def do(self, program):
+        pointer = program.runtime.pointer + self.value
+        program.runtime.pointer = move_pointer(program, pointer)
+
+    def lower(self):
+        return OP_MOVE, self.value
+
+
+class Clear(Operator):
+    """
+    The `[-]` (or `[+]`) loop, sets the current cell to zero at once.
+    If the loop goes away from zero, it passes the cell limit on the way,
+    so then the limit is checked by the single operator.
+    """
+
+    __slots__ = ("is_decrement",)
+
+    is_decrement: bool
+
+    def __init__(self, name: str, position: tuple[int, int], is_decrement: bool):
+        super().__init__(name, position)
+        self.is_decrement = is_decrement
+
+    def do(self, program):
+        runtime = program.runtime
+        value = runtime.tape[runtime.pointer]
+        if not value:
+            return
+
+        if self.is_decrement and value < 0:
+            program.check_on_min_value(program.config.minimum - 1)
+        elif not self.is_decrement and value > 0:
+            program.check_on_max_value(program.config.maximum + 1)
+        runtime.tape[runtime.pointer] = 0
+
+    def lower(self):
+        return OP_CLEAR, int(self.is_decrement)
+
+
+class AddToAndZero(Operator):
+    """
+    The `[->+<]` loop (with any distance between the cells), adds the
+    value of the current cell to the cell at `offset` and sets the
+    current cell to zero.
+    """
+
+    __slots__ = ("offset",)
+
+    offset: int
+
+    def __init__(self, name: str, position: tuple[int, int], offset: int):
+        super().__init__(name, position)
+        self.offset = offset
+
+    def do(self, program):
+        runtime = program.runtime
+        value = runtime.tape[runtime.pointer]
+        if not value:
+            return
+
+        if value < 0:
+            # the loop passes the minimum before reaching zero
+            program.check_on_min_value(program.config.minimum - 1)
+
+        target = move_pointer(program, runtime.pointer + self.offset)
+        new_val = runtime.tape[target] + value
+        runtime.tape[target] = program.check_on_max_value(new_val)
+        runtime.tape[runtime.pointer] = 0
+
+    def lower(self):
+        return OP_ADD_TO, self.offset
+
+
+class MultiplyAdd(Operator):
+    """
+    The loop that decrements the current cell by one and adds constant
+    values to other cells, such as `[->++>+<<]`: adds the current value
+    multiplied by the factor to each target cell and sets the current
+    cell to zero in one step.
+    If the loop leaves the tape, or the cells overflow on the way and the
+    overflow is off, the `body` of the loop is executed step by step, as
+    the loop itself.
+    """
+
+    __slots__ = ("body", "targets", "bounds")
+
+    body: tuple[Operator, ...]
+    # pairs of the cell offset and the factor of the current value
+    targets: tuple[tuple[int, int], ...]
+    # the smallest and the largest offset visited by the loop
+    bounds: tuple[int, int]
+
+    def __init__(
+            self,
+            name: str,
+            position: tuple[int, int],
+            body: tuple[Operator, ...],
+            targets: tuple[tuple[int, int], ...],
+            bounds: tuple[int, int],
+    ):
+        super().__init__(name, position)
+        self.body = body
+        self.targets = targets
+        self.bounds = bounds
+
+    def do(self, program):
+        runtime = program.runtime
+        tape = runtime.tape
+        pointer = runtime.pointer
+        value = tape[pointer]
+        if not value:
+            return
+
+        config = program.config
+        (low, high) = self.bounds
+        if value > 0 and 0 <= pointer + low and pointer + high < config.TAPE_LEN:
+            if config.HAS_OVERLOAD:
+                # the overflow wraps the value, so it is the same for the
+                # whole sum as for every step
+                for (offset, factor) in self.targets:
+                    new_val = tape[pointer + offset] + value * factor
+                    check = program.check_on_max_value if factor > 0 else program.check_on_min_value
+                    tape[pointer + offset] = check(new_val)
+                tape[pointer] = 0
+                return
+
+            new_values = [
+                (pointer + offset, tape[pointer + offset] + value * factor)
+                for (offset, factor) in self.targets
+            ]
+            if all(config.minimum <= new_val <= config.maximum for (_, new_val) in new_values):
+                for (target, new_val) in new_values:
+                    tape[target] = new_val
+                tape[pointer] = 0
+                return
+
+        while tape[runtime.pointer]:
+            for operator in self.body:
+                operator.do(program)
+
+
+class MoveToZero(Operator):
+    """
+    The `[>]` and `[<]` loops, moves the pointer to the nearest zero cell
+    in the direction of the `move` of the loop.
+    The byte tape is searched at once; for the other tapes, and if there
+    is no zero cell on the way, the `move` is done step by step, as the
+    loop itself.
+    """
+
+    __slots__ = ("move",)
+
+    move: Operator
+
+    def __init__(self, name: str, position: tuple[int, int], move: Operator):
+        super().__init__(name, position)
+        self.move = move
+
+    def do(self, program):
+        runtime = program.runtime
+        tape = runtime.tape
+        pointer = runtime.pointer
+        if not tape[pointer]:
+            return
+
+        if type(tape) is bytearray:
+            is_looped = program.config.IS_LOOPED
+            if self.move.value > 0:
+                found = tape.find(0, pointer)
+                if found == -1 and is_looped:
+                    found = tape.find(0, 0, pointer)
+            else:
+                found = tape.rfind(0, 0, pointer)
+                if found == -1 and is_looped:
+                    found = tape.rfind(0, pointer)
+            if found != -1:
+                runtime.pointer = found
+                return
+
+        while tape[runtime.pointer]:
+            self.move.do(program)
+
+
+def move_pointer(program: Program, pointer: int) -> int:
+    """
+    Returns the pointer moved to the tape, or raises an error as the
+    `Right` and `Left` operators do, if the tape is not looped.
+    """
+
+    size = program.config.TAPE_LEN
+    if 0 <= pointer < size:
+        return pointer
+
+    if program.config.IS_LOOPED:
+        return pointer % size
+
+    if pointer < 0:
+        msg = f"tape pointer out of range ({pointer} < 0)"
+    else:
+        msg = f"tape pointer out of range ({pointer} > {size - 1})"
+    raise ExecutionError(msg)
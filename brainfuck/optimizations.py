@@ -0,0 +1,194 @@
+from operators import *
+
+
+__all__ = [
+    "optimize",
+]
+
+
+# the operators whose rows are merged into one, and the direction of them
+RUN_OPERATORS = {
+    Increment: (Add, 1),
+    Decrement: (Add, -1),
+    Right: (Move, 1),
+    Left: (Move, -1),
+}
+
+
+def optimize(operators: list[Operator]) -> list[Operator]:
+    """
+    Replaces the typical sets of operators with the optimized operators
+    that do the same in one step.
+    The operator before `Repeat` is never replaced, otherwise the
+    `Repeat` would repeat the whole replaced set.
+    """
+
+    operators = merge_runs(operators)
+    operators = replace_loops(operators)
+    return operators
+
+
+def is_repeated(operators: list[Operator], index: int) -> bool:
+    return index + 1 < len(operators) and isinstance(operators[index + 1], Repeat)
+
+
+def merge_runs(operators: list[Operator]) -> list[Operator]:
+    """
+    Merges the rows of `Increment`/`Decrement` into `Add` and the rows of
+    `Right`/`Left` into `Move`.
+    """
+
+    merged = []
+    index = 0
+    while index < len(operators):
+        operator = operators[index]
+        if type(operator) not in RUN_OPERATORS or is_repeated(operators, index):
+            merged.append(operator)
+            index += 1
+            continue
+
+        end = index + 1
+        while (
+            end < len(operators)
+            and type(operators[end]) is type(operator)
+            and not is_repeated(operators, end)
+        ):
+            end += 1
+
+        run = operators[index:end]
+        operator_class, direction = RUN_OPERATORS[type(operator)]
+        name = "".join(item.name for item in run)
+        position = (run[0].position[0], run[-1].position[1])
+        merged.append(operator_class(name, position, direction * len(run)))
+        index = end
+
+    return merged
+
+
+def is_step(operator: Operator, operator_class: type, value: int = None) -> bool:
+    return (
+        type(operator) is operator_class
+        and (value is None or operator.value == value)
+    )
+
+
+def replace_loops(operators: list[Operator]) -> list[Operator]:
+    """
+    Replaces the loops `[-]`, `[+]` with `Clear`, the loops `[>]`, `[<]`
+    with `MoveToZero`, the loops `[->+<]`, `[>+<-]` (with any distance)
+    with `AddToAndZero` and the other loops that only add to the cells,
+    such as `[->++>+<<]`, with `MultiplyAdd`.
+    """
+
+    replaced = []
+    index = 0
+    while index < len(operators):
+        operator = operators[index]
+        new_operator, length = None, 0
+        if isinstance(operator, While):
+            new_operator, length = match_loop(operators, index)
+            if new_operator is None:
+                new_operator, length = match_multiply_loop(operators, index)
+
+        if new_operator is None or is_repeated(operators, index + length - 1):
+            replaced.append(operator)
+            index += 1
+            continue
+
+        replaced.append(new_operator)
+        index += length
+
+    return replaced
+
+
+def match_loop(operators: list[Operator], index: int) -> tuple[Operator, int]:
+    """
+    Returns the optimized operator for the loop starting at `index` and
+    the number of operators in the loop, or `(None, 0)` if the loop is
+    not a typical one.
+    """
+
+    def make_name(length: int) -> str:
+        return "".join(item.name for item in operators[index:index+length])
+
+    def make_position(length: int) -> tuple[int, int]:
+        return operators[index].position[0], operators[index+length-1].position[1]
+
+    body = operators[index+1:index+6]
+
+    if (
+        len(body) >= 2
+        and is_step(body[0], Add)
+        and abs(body[0].value) == 1
+        and isinstance(body[1], WhileEnd)
+    ):
+        operator = Clear(make_name(3), make_position(3), body[0].value < 0)
+        return operator, 3
+
+    if (
+        len(body) >= 2
+        and is_step(body[0], Move)
+        and abs(body[0].value) == 1
+        and isinstance(body[1], WhileEnd)
+    ):
+        operator = MoveToZero(make_name(3), make_position(3), body[0])
+        return operator, 3
+
+    if len(body) < 5 or not isinstance(body[4], WhileEnd):
+        return None, 0
+
+    # `[->+<]` or `[>+<-]`
+    if is_step(body[0], Add, -1):
+        move, add, move_back = body[1:4]
+    elif is_step(body[3], Add, -1):
+        move, add, move_back = body[0:3]
+    else:
+        return None, 0
+
+    if (
+        is_step(move, Move)
+        and is_step(add, Add, 1)
+        and is_step(move_back, Move, -move.value)
+    ):
+        operator = AddToAndZero(make_name(6), make_position(6), move.value)
+        return operator, 6
+
+    return None, 0
+
+
+def match_multiply_loop(operators: list[Operator], index: int) -> tuple[Operator, int]:
+    """
+    Returns `MultiplyAdd` for the loop starting at `index` and the number
+    of operators in the loop, or `(None, 0)` if the loop does something
+    other than adding to the cells.
+    The loop has to return to the current cell and decrement it by one,
+    and each cell is changed by one operator only, so its value changes
+    in one direction.
+    """
+
+    targets = {}
+    offset = low = high = 0
+    end = index + 1
+    while end < len(operators) and not isinstance(operators[end], WhileEnd):
+        operator = operators[end]
+        if is_step(operator, Move):
+            offset += operator.value
+            low, high = min(low, offset), max(high, offset)
+        elif is_step(operator, Add) and offset not in targets:
+            targets[offset] = operator.value
+        else:
+            return None, 0
+        end += 1
+
+    if end == len(operators) or offset != 0 or targets.pop(0, None) != -1 or not targets:
+        return None, 0
+
+    loop = operators[index:end+1]
+    operator = MultiplyAdd(
+        "".join(item.name for item in loop),
+        (loop[0].position[0], loop[-1].position[1]),
+        tuple(operators[index+1:end]),
+        tuple(targets.items()),
+        (low, high),
+    )
+    return operator, len(loop)
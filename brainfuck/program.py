@@ -1,15 +1,23 @@
 from __future__ import annotations
-from typing import Protocol
+from array import array
+from typing import Callable, MutableSequence, Optional, Protocol
 
 from exeptions import ExecutionError
-from config import Config
+from config import Config, Clamper, build_clampers
+from codegen import FUNCTION_NAME, compile_source, make_source
+from opcodes import *
 
 
 __all__ = [
     "Program",
+    "STOP",
 ]
 
 
+# returned by `Operator.do` to stop the program (the `End` operator does it)
+STOP = object()
+
+
 class Operator(Protocol):
     """
     Operator interface. This is the minimum set of parameters.
@@ -17,8 +25,12 @@ class Operator(Protocol):
 
     name: str
     position: tuple[int, int]
+    is_jumping: bool
+
+    def do(self, program: Program) -> Optional[object]:
+        pass
 
-    def do(self, program: Program):
+    def lower(self) -> tuple[int, int]:
         pass
 
 
@@ -28,49 +40,225 @@ class RunTime:
     in the program at execution time.
     """
 
-    tape: list[int]
+    __slots__ = (
+        "program",
+        "tape",
+        "pointer",
+        "cursor",
+        "params",
+        "codes",
+        "args",
+        "_output",
+        "_linebreak_required",
+    )
+
+    program: Program
+    tape: MutableSequence[int]
     pointer: int
     cursor: int
-    is_running: bool
     params: dict
+    # the lowered operators (see `Operator.lower`), by the operator index
+    codes: array
+    args: array
 
+    # the output that is not printed yet, it is printed by lines or when
+    # it becomes too long (see `.flush`)
+    _output: list[str]
     _linebreak_required: bool
 
+    OUTPUT_LIMIT = 4096
+
     def __init__(self, program: Program):
         self.program = program
 
         self.cursor = 0
         self.pointer = 0
-        self.tape: list[int] = [0] * Config.TAPE_LEN
-        self.is_running = True
+        self.tape = program.config.make_tape()
         self.params = dict()
 
+        lowered = [operator.lower() for operator in program.operators]
+        self.codes = array("i", [code for (code, _) in lowered])
+        self.args = array("i", [arg for (_, arg) in lowered])
+
+        self._output = []
         self._linebreak_required = False
 
+    def write(self, char: str):
+        """
+        Adds the character to the output.
+        """
+
+        self._output.append(char)
+        if char == "\n" or len(self._output) >= self.OUTPUT_LIMIT:
+            self.flush()
+
+    def flush(self):
+        """
+        Prints the output that is not printed yet.
+        """
+
+        if self._output:
+            print("".join(self._output), end="")
+            self._output.clear()
+
     def execute(self):
         """
         The list of commands is executed until the program stops.
+        The main operators are executed here by their codes, the others
+        (and the main ones in the rare cases, such as errors) are
+        executed by their `do` method; the cursor and the pointer are
+        kept in the runtime at that time.
         If there is an error, it looks for the command that triggered it
         and displays information about the error.
         """
 
-        self.cursor = 0
-        while self.is_running:
-            self.operator.do(self.program)
-            self.cursor += 1
+        program = self.program
+        operators = program.operators
+        codes = self.codes
+        args = self.args
+        tape = self.tape
+        output = self._output
+        output_limit = self.OUTPUT_LIMIT
+        size = program.config.TAPE_LEN
+        is_looped = program.config.IS_LOOPED
+        maximum = program.config.maximum
+        minimum = program.config.minimum
+        has_overload = program.config.HAS_OVERLOAD
+        # the number of the cell values
+        variants = maximum - minimum + 1
+
+        cursor = 0
+        pointer = self.pointer
+        while True:
+            code = codes[cursor]
+
+            if code == OP_ADD:
+                value = tape[pointer] + args[cursor]
+                if minimum <= value <= maximum:
+                    tape[pointer] = value
+                    cursor += 1
+                    continue
+                if has_overload:
+                    # the same as the clampers do (see `build_clampers`)
+                    tape[pointer] = minimum + (value - minimum) % variants
+                    cursor += 1
+                    continue
+
+            elif code == OP_MOVE:
+                new_pointer = pointer + args[cursor]
+                if 0 <= new_pointer < size:
+                    pointer = new_pointer
+                    cursor += 1
+                    continue
+                if is_looped:
+                    # the same as `Right`, `Left` and `Move` do
+                    pointer = new_pointer % size
+                    cursor += 1
+                    continue
+
+            elif code == OP_WHILE:
+                if not tape[pointer]:
+                    cursor = args[cursor]
+                cursor += 1
+                continue
+
+            elif code == OP_WHILE_END:
+                if tape[pointer]:
+                    cursor = args[cursor]
+                cursor += 1
+                continue
+
+            elif code == OP_CLEAR:
+                value = tape[pointer]
+                if (value > 0) if args[cursor] else (value < 0):
+                    tape[pointer] = 0
+                    cursor += 1
+                    continue
+                if not value:
+                    cursor += 1
+                    continue
+
+            elif code == OP_ADD_TO:
+                value = tape[pointer]
+                if not value:
+                    cursor += 1
+                    continue
+                target = pointer + args[cursor]
+                if value > 0 and 0 <= target < size and tape[target] + value <= maximum:
+                    tape[target] += value
+                    tape[pointer] = 0
+                    cursor += 1
+                    continue
+
+            elif code == OP_OUTPUT:
+                char_code = tape[pointer]
+                if 0 <= char_code < 0x10ffff:  # `Output.UNICODE_MAX`
+                    output.append(chr(char_code))
+                    if char_code == 10 or len(output) >= output_limit:  # "\n"
+                        self.flush()
+                    self._linebreak_required = char_code != 10
+                    cursor += 1
+                    continue
+
+            elif code == OP_END:
+                break
+
+            # `OP_CALL` and the cases not handled above
+            self.cursor = cursor
+            self.pointer = pointer
+            if operators[cursor].do(program) is STOP:
+                break
+            cursor = self.cursor + 1
+            pointer = self.pointer
+
+        self.cursor = cursor
+        self.pointer = pointer
+        self.flush()
+
+    def compile(self) -> Optional[Callable[[], None]]:
+        """
+        Compiles the program into a Python function (see `codegen`) and
+        returns a function that executes it as `.execute()` does.
+        The compiled program has no dispatch between the operators, so
+        it is faster for long-running programs, but the compilation
+        itself takes time.
+        Returns None if the program cannot be compiled: there are the
+        operators that move the cursor by themselves, or the loops are
+        not paired.
+        """
+
+        program = self.program
+        operators = program.operators
+        if any(operator.is_jumping for operator in operators):
+            return None
+
+        source = make_source(self.codes, self.args, program.config)
+        code = source and compile_source(source)
+        if code is None:
+            return None
+
+        namespace = {}
+        exec(code, namespace)
+        function = namespace[FUNCTION_NAME]
+
+        def call(index: int, pointer: int) -> int:
+            # executes the operator as `.execute()` does it
+            self.cursor = index
+            self.pointer = pointer
+            operators[index].do(program)
+            return self.pointer
+
+        def execute():
+            self.pointer = function(self.tape, self.pointer, call)
+            self.cursor = len(operators) - 1
+            self.flush()
+
+        return execute
 
     @property
     def operator(self) -> Operator:
         return self.program.operators[self.cursor]
 
-    @property
-    def current_val(self) -> int:
-        return self.tape[self.pointer]
-
-    @current_val.setter
-    def current_val(self, value: int):
-        self.tape[self.pointer] = value
-
 
 class Program:
     """
@@ -85,16 +273,27 @@ class Program:
     operators: list[Operator]
     config: Config
     runtime: RunTime
+    # config checks specialized for the current config
+    check_on_max_value: Clamper
+    check_on_min_value: Clamper
 
     def __init__(self, text: str, operators: list[Operator], config: Config = None):
         self.text = text
         self.operators = operators
         self.config = config or Config()
+        self.check_on_max_value, self.check_on_min_value = build_clampers(self.config)
         self.runtime = RunTime(self)
 
-    def run(self):
+    def run(self, compiled: bool = False):
+        """
+        Executes the program and displays the errors.
+        If `compiled` is set, the program is compiled before it is
+        executed (see `RunTime.compile`), if it is possible.
+        """
+
+        execute = compiled and self.runtime.compile() or self.runtime.execute
         try:
-            self.runtime.execute()
+            execute()
         except ExecutionError as error:
             # error in program logic
             self._break_line()
@@ -108,8 +307,10 @@ class Program:
 
     def _break_line(self):
         """
-        Breaks the line if necessary. Used to display errors, for example.
+        Prints the rest of the output and breaks the line if necessary.
+        Used to display errors, for example.
         """
+        self.runtime.flush()
         if self.runtime._linebreak_required:
             print()
 
@@ -150,13 +351,17 @@ class Program:
 
         indent = 20
 
-        previous = self.text[max(start - indent, 0):start]
-        if (ind := previous.rfind("\n")) >= 0:
-            previous = previous[ind+1:]
-
-        subsequent = self.text[end:end+indent]
-        if (ind := subsequent.find("\n")) >= 0:
-            subsequent = subsequent[:ind]
+        # the context is cut at the line breaks, they are searched in the
+        # text itself without slicing it
+        previous_start = max(start - indent, 0)
+        if (ind := self.text.rfind("\n", previous_start, start)) >= 0:
+            previous_start = ind + 1
+        previous = self.text[previous_start:start]
+
+        subsequent_end = end + indent
+        if (ind := self.text.find("\n", end, subsequent_end)) >= 0:
+            subsequent_end = ind
+        subsequent = self.text[end:subsequent_end]
 
         context = previous + operator_text + subsequent
         underline = " "*len(previous) + "^"*len(operator_text) + " "*len(subsequent)
@@ -5,7 +5,8 @@ Another one, but my own.
 """
 
 from __future__ import annotations
-from typing import Union, Optional
+from itertools import starmap
+from typing import Iterator, Optional
 
 
 __all__ = [
@@ -20,35 +21,46 @@ class Cell:
     its data.
     """
 
+    __slots__ = (
+        "content",
+        "width",
+        "height",
+        "flat_view",
+    )
+
     content: list[str]
     width: int
     height: int
+    # its value in one line
+    flat_view: str
 
     def __init__(self, data: str):
-        content = str(data).splitlines()
-        content = content or [""]
-        content = list(map(
-            lambda text: text.replace("\t", " ").rstrip().lstrip(),
-            content
-        ))
+        content = str(data).splitlines() or [""]
+        content = [line.replace("\t", " ").strip() for line in content]
 
         self.content = content
         self.height = len(content)
-        self.width = max(len(s) for s in content)
+        self.width = max(map(len, content))
+        self.flat_view = " ".join(content)
 
-    _Sequence = Union[str, list]
+    @staticmethod
+    def line_to_size(line: str, width: int) -> str:
+        """
+        Symmetrically increases the line to the desired width by adding
+        spaces from the ends (the odd one is added at the beginning).
+        """
+        return line.rjust((len(line) + width + 1) // 2).ljust(width)
 
     @staticmethod
-    def sequence_to_size(sequence: _Sequence, size: int, null: _Sequence) -> _Sequence:
+    def lines_to_size(lines: list[str], height: int, blank: str = "") -> list[str]:
         """
-        Symmetrically increases the sequence to the desired size by
-        adding empty data from the ends.
+        Symmetrically increases the lines to the desired height by adding
+        blank lines from the ends (the odd one is added at the beginning).
         """
 
-        length = len(sequence)
-        last = (size - length) // 2
-        first = last + (size - length) % 2
-        return null * first + sequence + null * last
+        last = (height - len(lines)) // 2
+        first = height - len(lines) - last
+        return [blank] * first + lines + [blank] * last
 
     def as_size(self, width: int, height: int) -> list[str]:
         """
@@ -56,16 +68,12 @@ class Cell:
         rectangle.
         """
 
-        content = self.sequence_to_size(self.content, height, [""])
-        content = [self.sequence_to_size(line, width, " ") for line in content]
-        return content
+        content = [self.line_to_size(line, width) for line in self.content]
+        if self.height == height:
+            return content
 
-    @property
-    def flat_view(self) -> str:
-        """
-        Returns its value in one line.
-        """
-        return " ".join(self.content)
+        # the added lines are the same empty line of the desired width
+        return self.lines_to_size(content, height, " " * width)
 
 
 class TableGenerator:
@@ -80,9 +88,19 @@ class TableGenerator:
     table: list[list[Cell]]
     widths: list[int]
     heights: list[int]
+    # the lines of the rows, each line is a tuple of the cell data
+    # filled in to the sizes of its row and column
+    contents: list[list[tuple[str, ...]]]
     row_separator: str
     cell_separator: list[str]
+    # the separators with the highlighted first column
+    _marked_row_separator: str
+    _marked_cell_separator: list[str]
     name: Optional[str]
+    # the generated tables by the parameters of `generate`, and the table
+    # for pasting
+    _generated: dict[tuple[bool, bool], str]
+    _paste_view: Optional[str]
 
     def __init__(
             self,
@@ -92,6 +110,8 @@ class TableGenerator:
     ):
         self.table = self._generate_table(body, header, params)
         self._calculate_sizes()
+        self._generated = {}
+        self._paste_view = None
 
     @staticmethod
     def _generate_table(body, header, params) -> list[list[Cell]]:
@@ -129,23 +149,41 @@ class TableGenerator:
     def _calculate_sizes(self) -> None:
         """
         Calculates the maximum height/width values for rows/columns (to
-        fit all the data). Based on this, it creates a separator for rows
-        and for columns.
+        fit all the data). Based on this, it fills in the cells to these
+        sizes and creates the separators for rows and for columns (plain
+        and with the highlighted first column).
         """
 
         self.widths = [
-            max(cell.width for cell in column) + 2  # 2 - for cell margins
+            max([cell.width for cell in column]) + 2  # 2 - for cell margins
             for column in zip(*self.table)
         ]
         self.heights = [
-            max(cell.height for cell in row)
+            max([cell.height for cell in row])
             for row in self.table
         ]
 
+        self.contents = [
+            list(zip(*[
+                cell.as_size(width, height)
+                for (cell, width) in zip(row, self.widths)
+            ]))
+            for (row, height) in zip(self.table, self.heights)
+        ]
+
         horizontal_cell_separators = ["-" * width for width in self.widths]
-        self.row_separator = "+".join([""] + horizontal_cell_separators + [""])
+        self.row_separator = "+" + "+".join(horizontal_cell_separators) + "+"
         self.cell_separator = ["|"] * (len(self.widths) + 1)
 
+        second_plus_index = self.row_separator.index("+", 1)
+        self._marked_row_separator = (
+            "+"
+            + self.row_separator[:second_plus_index]
+            + "+"
+            + self.row_separator[second_plus_index:]
+        )
+        self._marked_cell_separator = ["||", "||"] + self.cell_separator[2:]
+
     @staticmethod
     def from_dicts_preprocess(value: list[list]) -> list[list]:
         """
@@ -193,68 +231,54 @@ class TableGenerator:
         representation.
         Parameters allow you to enable highlighting (double lines) of the
         header and names.
+        The table is generated once for each set of parameters.
         """
 
-        def join_line(one_line_strings):
-            """
-            Connects the data in one line.
-            """
-            return cell_separator[0] + "".join(
-                string + sep
-                for (string, sep) in zip(one_line_strings, cell_separator[1:])
-            )
+        key = (mark_header, mark_params)
+        if key in self._generated:
+            return self._generated[key]
 
-        def generate_row(row: list[Cell], height) -> list[str]:
+        def generate_row(row_lines: list[tuple[str, ...]]) -> Iterator[str]:
             """
-            Generates a ready to print row from the list of cells (the
-            internal representation of the row).
+            Generates a ready to print row from the lines of the filled in
+            cells of the row.
+            The lines are added to the table as they are generated, without
+            a list for the row.
             """
-
-            list_cells = [
-                cell.as_size(width, height)
-                for (cell, width) in zip(row, self.widths)
-            ]
-            list_strings = [
-                join_line(one_line_strings)
-                for one_line_strings in zip(*list_cells)
-            ]
-
-            return list_strings
+            return starmap(join_line, row_lines)
 
         assert self.table, "No data - table is empty!"
 
         # create data for generate
-        cell_separator = self.cell_separator.copy()
-        row_separator = self.row_separator
+        if mark_params:
+            cell_separator = self._marked_cell_separator
+            row_separator = self._marked_row_separator
+        else:
+            cell_separator = self.cell_separator
+            row_separator = self.row_separator
         header_row_separator = row_separator
 
-        if mark_params:
-            cell_separator[0], cell_separator[1] = "||", "||"
-            second_plus_index = row_separator[1:].index("+") + 1
-            row_separator = (
-                "+"
-                + row_separator[:second_plus_index]
-                + "+"
-                + row_separator[second_plus_index:]
-            )
-            header_row_separator = row_separator
+        # connects the data in one line, the line template is the same for
+        # all the lines ("|{}|{}|" and so on), the separators have no braces
+        join_line = (cell_separator[0] + "".join(
+            "{}" + sep for sep in cell_separator[1:]
+        )).format
 
         if mark_header:
             header_row_separator = header_row_separator.replace("-", "=")
 
         # add header row
-        table_strings: list[str] = (
-            [header_row_separator]
-            + generate_row(self.table[0], self.heights[0])
-            + [header_row_separator]
-        )
+        table_strings: list[str] = [header_row_separator]
+        table_strings += generate_row(self.contents[0])
+        table_strings.append(header_row_separator)
 
         # generate  rest of table
-        for (row, height) in zip(self.table[1:], self.heights[1:]):
-            table_strings += generate_row(row, height)
-            table_strings += [row_separator]
+        for row_lines in self.contents[1:]:
+            table_strings += generate_row(row_lines)
+            table_strings.append(row_separator)
 
         str_table = "\n".join(table_strings)
+        self._generated[key] = str_table
         return str_table
 
     def for_paste_view(self):
@@ -271,14 +295,17 @@ class TableGenerator:
 
         assert self.table, "No data - table is empty!"
 
+        if self._paste_view is not None:
+            return self._paste_view
+
         table_strings = [
             "\t".join(
                 cell.flat_view for cell in row
             )
             for row in self.table
         ]
-        str_table = "\n".join(table_strings)
-        return str_table
+        self._paste_view = "\n".join(table_strings)
+        return self._paste_view
 
 
 if __name__ == "__main__":